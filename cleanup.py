@@ -2,7 +2,13 @@
 
 from document import Document
 from collections import Counter
+from itertools import chain
 import string
+import sys
+
+# Translation table that deletes all punctuation marks, built once instead of on every remove_symbols() call.
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
 
 def remove_symbols(text_string: str) -> str:
     """
@@ -12,85 +18,83 @@ def remove_symbols(text_string: str) -> str:
     :param text_string: The string to be cleaned.
     :return: The cleaned string.
     """
-    # Remove "'s" occurrences
-    cleaned_text = text_string.replace("'s", "")
-
-    # Remove all punctuation marks
-    cleaned_text = cleaned_text.translate(str.maketrans('', '', string.punctuation))
+    # Remove "'s" occurrences, then all punctuation marks
+    return text_string.replace("'s", "").translate(_PUNCTUATION_TABLE)
 
-    return cleaned_text
-
-def is_stop_word(term: str, stop_word_list: list[str]) -> bool:
+def is_stop_word(term: str, stop_word_list: frozenset[str]) -> bool:
     """
-    Checks if a given term is a stop word.
-    :param stop_word_list: List of all considered stop words.
+    Checks if a given term is a stop word (case-insensitively).
+    :param stop_word_list: Set of all considered stop words (lower case).
     :param term: The term to be checked.
     :return: True if the term is a stop word.
     """
     return term.lower() in stop_word_list
 
-def remove_stop_words_from_term_list(term_list: list[str], stop_word_list: list[str]) -> list[str]:
+def _kept_terms(terms, stop_word_list: frozenset[str]) -> dict:
+    """
+    Cleans every distinct term once: symbols are stripped and stop words are recognized case-insensitively.
+    :param terms: Iterable of (raw) terms
+    :param stop_word_list: Set of stop words
+    :return: Dictionary that maps each term to its cleaned form, or to None if it is a stop word
     """
-    Takes a list of terms and removes all terms that are stop words.
+    kept_terms = {}
+    for term in set(terms):
+        cleaned_term = sys.intern(remove_symbols(term))
+        kept_terms[term] = None if is_stop_word(cleaned_term, stop_word_list) else cleaned_term
+    return kept_terms
+
+
+def remove_stop_words_from_term_list(term_list: list[str], stop_word_list: frozenset[str]) -> list[str]:
+    """
+    Takes a list of terms and removes all terms that are stop words. Symbols are stripped from the terms first and stop
+    words are recognized case-insensitively, so raw terms (e.g. of hand-built documents or older collection files) are
+    handled as well as the cleaned terms of extraction.extract_collection().
     :param term_list: List that contains the terms
-    :param stop_word_list: List of stop words
-    :return: List of terms without stop words
+    :param stop_word_list: Set of stop words
+    :return: List of the (symbol-free) terms without stop words
     """
-    cleaned_terms = []
-    for term in term_list:
-        term = remove_symbols(term)
-        if not is_stop_word(term, stop_word_list):
-            cleaned_terms.append(term)
-    return cleaned_terms
+    kept_terms = _kept_terms(term_list, stop_word_list)
+    return [kept_terms[term] for term in term_list if kept_terms[term] is not None]
 
 
-def filter_collection(collection: list[Document], stop_word_list: list[str]):
+def filter_collection(collection: list[Document], stop_word_list: frozenset[str]):
     """
     For each document in the given collection, this method takes the term list and filters out the stop words.
     Warning: The result is NOT saved in the documents term list, but in an extra field called filtered_terms.
 
     :param collection: Document collection to process
-    :param stop_word_list: List of stop words to filter out
+    :param stop_word_list: Set of stop words to filter out
     """
+    # Each distinct term of the whole collection is cleaned only once, see remove_stop_words_from_term_list()
+    kept_terms = _kept_terms(chain.from_iterable(doc.terms for doc in collection), stop_word_list)
     for document in collection:
-        document.filtered_terms = remove_stop_words_from_term_list(document.terms, stop_word_list)
+        document.filtered_terms = [kept_terms[term] for term in document.terms if kept_terms[term] is not None]
 
 
-def load_stop_word_list(raw_file_path: str) -> list[str]:
+def load_stop_word_list(raw_file_path: str) -> frozenset[str]:
     """
-    Loads a text file that contains stop words and saves it as a list. The text file is expected to be formatted so that
+    Loads a text file that contains stop words and saves it as a set. The text file is expected to be formatted so that
     each stop word is in a new line, e. g. like englishST.txt
     :param raw_file_path: Path to the text file that contains the stop words
-    :return: List of stop words
+    :return: Set of stop words (a set, so that membership tests are O(1))
     """
-    # TODO: Implement this function. (PR02)
     with open(raw_file_path, 'r') as file:
-        stop_word_list = [line.strip().lower() for line in file]
-    return stop_word_list
+        return frozenset(sys.intern(line.strip().lower()) for line in file)
 
 
-def create_stop_word_list_by_frequency(collection: list[Document]) -> list[str]:
+def create_stop_word_list_by_frequency(collection: list[Document], high_frequency_threshold: int = 100,
+                                       low_frequency_threshold: int = 5) -> frozenset[str]:
     """
     Uses the method of J. C. Crouch (1990) to generate a stop word list by finding high and low frequency terms in the
     provided collection.
     :param collection: Collection to process
     :param high_frequency_threshold: Threshold for high frequency terms
     :param low_frequency_threshold: Threshold for low frequency terms
-    :return: List of stop words
+    :return: Set of stop words
     """
-    # Count term frequency in the collection
-    term_counter = Counter()
-    for doc in collection:
-        term_counter.update(doc.terms)
-
-    # Sort terms by frequency
-    sorted_terms = sorted(term_counter.items(), key=lambda x: x[1], reverse=True)
-    high_frequency_threshold = 100  # Example threshold for high frequency terms
-    low_frequency_threshold = 5  # Example threshold for low frequency terms
-    # Determine high and low frequency terms
-
-    high_frequency_terms = [term for term, freq in sorted_terms if freq >= high_frequency_threshold]
-    low_frequency_terms = [term for term, freq in sorted_terms if freq <= low_frequency_threshold]
-
-    # Return low frequency terms as stop words
-    return low_frequency_terms
+    # Count term frequency in the collection (one Counter pass over all terms of all documents)
+    term_counter = Counter(chain.from_iterable(doc.terms for doc in collection))
+
+    # Return low frequency terms as stop words (high frequency terms are not part of the list); a single pass over the
+    # counts finds them, no sorting needed.
+    return frozenset(term for term, freq in term_counter.items() if freq <= low_frequency_threshold)
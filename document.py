@@ -1,6 +1,17 @@
 # Contains a unified class definition for a document.
 
+import sys
+
+
+def _interned(terms: list[str]) -> list[str]:
+    # Repeated terms of a loaded collection share one string object (less memory, identity fast path in lookups).
+    return None if terms is None else list(map(sys.intern, terms))
+
+
 class Document(object):
+    # Fixed attribute layout: no per-instance __dict__, which keeps large collections compact.
+    __slots__ = ('document_id', 'title', 'raw_text', 'terms', 'filtered_terms', 'stemmed_terms')
+
     def __init__(self):
         self.document_id = None  # Unique document ID
         self.title = ''  # Title of document
@@ -10,6 +21,32 @@ class Document(object):
         self.stemmed_terms = []  # Holds terms that were stemmed with Porter algorithm. (Only relevant in PR03!)
         # Note: See PR02 task description for instructions regarding these properties.
 
+    @classmethod
+    def from_dict(cls, doc_dict: dict) -> 'Document':
+        """
+        Creates a document from a dictionary as produced by to_dict() (e.g. an entry of the JSON collection).
+        """
+        document = cls()
+        document.document_id = doc_dict.get('document_id')
+        document.title = doc_dict.get('title')
+        document.raw_text = doc_dict.get('raw_text')
+        document.terms = _interned(doc_dict.get('terms'))
+        document.filtered_terms = _interned(doc_dict.get('filtered_terms'))
+        document.stemmed_terms = _interned(doc_dict.get('stemmed_terms'))
+        return document
+
+    def to_dict(self) -> dict:
+        """
+        Returns the JSON-serializable fields of the document as a dictionary.
+        """
+        return {
+            'document_id': self.document_id,
+            'title': self.title,
+            'raw_text': self.raw_text,
+            'terms': self.terms,
+            'filtered_terms': self.filtered_terms,
+            'stemmed_terms': self.stemmed_terms
+        }
 
     def __str__(self):
         shortened_content = self.raw_text[:10] + "..." if len(self.raw_text) > 10 else self.raw_text
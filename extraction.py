@@ -1,9 +1,60 @@
 # Contains functions that deal with the extraction of documents from a text file (see PR01)
 
 import json
+import re
+import sys
 
+try:
+    import orjson  # Optional, C-accelerated JSON encoder/decoder
+except ImportError:
+    orjson = None
+
+from cleanup import remove_symbols
 from document import Document
 
+FABLE_SEPARATOR = '\n\n\n\n'  # Fables are separated by 4 newlines
+PARAGRAPH_SEPARATOR = '\n\n'  # The first paragraph of a fable is its title
+
+# Ground truth lines look like "search term - 4, 10, 11"; lines starting with '#' are comments.
+_GROUND_TRUTH_LINE = re.compile(r'^[ \t]*([^#\s-][^\n-]*?)\s*-([^\n-]*)', re.MULTILINE)
+_DOC_ID = re.compile(r'\d+')
+
+
+def _iter_fables(content: str, start: int = 0):
+    """
+    Lazily yields the text between consecutive fable separators, without building the list of all fables first.
+    :param content: Text that contains the fables
+    :param start: Index in content where the first fable starts
+    :return: Generator of fable texts (same pieces as content[start:].split(FABLE_SEPARATOR))
+    """
+    while (end := content.find(FABLE_SEPARATOR, start)) != -1:
+        yield content[start:end]
+        start = end + len(FABLE_SEPARATOR)
+    yield content[start:]
+
+
+def _dump_json(obj, file_path: str) -> None:
+    """
+    Writes obj as JSON to the given file, using orjson if it is available.
+    """
+    if orjson is not None:
+        with open(file_path, 'wb') as json_file:
+            json_file.write(orjson.dumps(obj))
+    else:
+        with open(file_path, 'w') as json_file:
+            json.dump(obj, json_file)
+
+
+def _load_json(file_path: str):
+    """
+    Reads a JSON file, using orjson if it is available.
+    """
+    if orjson is not None:
+        with open(file_path, 'rb') as json_file:
+            return orjson.loads(json_file.read())
+    with open(file_path, 'r') as json_file:
+        return json.load(json_file)
+
 
 def extract_collection(source_file_path: str) -> list[Document]:
     """
@@ -22,26 +73,22 @@ def extract_collection(source_file_path: str) -> list[Document]:
     if fable_start_index == -1:
         raise ValueError("Start marker for fables not found.")
 
-    # Extract content starting from the fables section
-    content = content[fable_start_index:]
-
-    # Splitting by 4 newlines to separate each fable
-    fables = content.split('\n\n\n\n')
-
     catalog = []
-    for doc_id, fable in enumerate(fables):
-        parts = fable.strip().split('\n\n')
-        if len(parts) < 2:
+    for doc_id, fable in enumerate(_iter_fables(content, fable_start_index)):
+        title, separator, body = fable.strip().partition(PARAGRAPH_SEPARATOR)
+        if not separator:
             continue
 
-        title = parts[0].strip()
-        raw_text = ' '.join(parts[1:]).replace('\n', ' ').strip()
+        title = title.strip()
+        raw_text = body.replace(PARAGRAPH_SEPARATOR, ' ').replace('\n', ' ').strip()
 
         document = Document()
         document.document_id = doc_id -1
         document.title = title
         document.raw_text = raw_text
-        document.terms = raw_text.split()
+        # Symbols are stripped and terms lowercased once here instead of on every stop word filtering pass; interned so
+        # that repeated terms share one string object
+        document.terms = list(map(sys.intern, remove_symbols(raw_text).lower().split()))
 
         catalog.append(document)
 
@@ -56,19 +103,8 @@ def save_collection_as_json(collection: list[Document], file_path: str) -> None:
     :param file_path: Path of the JSON file
     """
 
-    serializable_collection = []
-    for document in collection:
-        serializable_collection += [{
-            'document_id': document.document_id,
-            'title': document.title,
-            'raw_text': document.raw_text,
-            'terms': document.terms,
-            'filtered_terms': document.filtered_terms,
-            'stemmed_terms': document.stemmed_terms
-        }]
-
-    with open(file_path, "w") as json_file:
-        json.dump(serializable_collection, json_file)
+    serializable_collection = [document.to_dict() for document in collection]
+    _dump_json(serializable_collection, file_path)
 
 
 def load_collection_from_json(file_path: str) -> list[Document]:
@@ -78,21 +114,8 @@ def load_collection_from_json(file_path: str) -> list[Document]:
     :return: list of Document objects
     """
     try:
-        with open(file_path, "r") as json_file:
-            json_collection = json.load(json_file)
-
-        collection = []
-        for doc_dict in json_collection:
-            document = Document()
-            document.document_id = doc_dict.get('document_id')
-            document.title = doc_dict.get('title')
-            document.raw_text = doc_dict.get('raw_text')
-            document.terms = doc_dict.get('terms')
-            document.filtered_terms = doc_dict.get('filtered_terms')
-            document.stemmed_terms = doc_dict.get('stemmed_terms')
-            collection += [document]
-
-        return collection
+        json_collection = _load_json(file_path)
+        return [Document.from_dict(doc_dict) for doc_dict in json_collection]
     except FileNotFoundError:
         print('No collection was found. Creating empty one.')
         return []
@@ -104,18 +127,13 @@ def load_ground_truth(filepath: str) -> dict:
     :param filepath: Path to the ground truth file.
     :return: A dictionary with query terms as keys and sets of relevant document IDs as values.
     """
-    ground_truth = {}
     try:
         with open(filepath, 'r') as file:
-            for line in file:
-                if '-' in line:
-                    parts = line.split('-')
-                    query = parts[0].strip()
-                    try:
-                        relevant_docs = set(int(doc_id.strip()) - 1 for doc_id in parts[1].split(',') if doc_id.strip().isdigit())
-                        ground_truth[query] = relevant_docs
-                    except ValueError:
-                        print(f"Skipping line due to ValueError: {line}")
+            content = file.read()
     except FileNotFoundError:
         print('Ground truth file not found.')
-    return ground_truth
+        return {}
+
+    # IDs in the file start with 1, document IDs start with 0.
+    return {match.group(1): {int(doc_id) - 1 for doc_id in _DOC_ID.findall(match.group(2))}
+            for match in _GROUND_TRUTH_LINE.finditer(content)}
@@ -16,10 +16,16 @@
 # Good luck!
 
 
+import heapq
 import json
 import os
 import re
+import sys
 import time
+from collections import OrderedDict
+from operator import itemgetter
+
+import numpy as np
 
 import cleanup
 import extraction
@@ -40,6 +46,12 @@ GROUND_TRUTH_PATH = os.path.join(RAW_DATA_PATH, 'ground_truth.txt')
 MODEL_BOOL_LIN, MODEL_BOOL_INV, MODEL_BOOL_SIG, MODEL_FUZZY, MODEL_VECTOR = 1, 2, 3, 4, 5
 SW_METHOD_LIST, SW_METHOD_CROUCH = 1, 2
 
+# Splits a query into its terms on the logical operators (used to look up the ground truth).
+QUERY_OPERATOR_PATTERN = re.compile(r'[&|\-]')
+
+# Number of search results kept in the LRU result cache of the CLI.
+RESULT_CACHE_SIZE = 1024
+
 
 class InformationRetrievalSystem(object):
     def __init__(self):
@@ -53,19 +65,52 @@ class InformationRetrievalSystem(object):
             print('No previous collection was found. Creating empty one.')
             self.collection = []
 
-        # Stopword list, initially empty.
+        # Stopword list, initially empty. Kept as a set for O(1) membership tests.
         try:
             with open(STOPWORD_FILE_PATH, 'r') as f:
-                self.stop_word_list = json.load(f)
+                self.stop_word_list = frozenset(map(sys.intern, json.load(f)))
         except FileNotFoundError:
             print('No stopword list was found.')
-            self.stop_word_list = []
+            self.stop_word_list = frozenset()
 
         self.model = None  # Saves the current IR model in use.
-        self.output_k = 5  # Controls how many results should be shown for a query.
+        self.output_k = None  # Controls how many results should be shown for a query (None: all matching documents).
         
         self.ground_truth = extraction.load_ground_truth(GROUND_TRUTH_PATH)
 
+        # Dispatch table of the main menu (CHOICE_EXIT is handled by the loop itself).
+        self._menu_actions = {
+            CHOICE_LIST: self._list_documents,
+            CHOICE_SEARCH: self._search,
+            CHOICE_EXTRACT: self._build_collection,
+            CHOICE_UPDATE_STOP_WORDS: self._rebuild_stop_word_list,
+            CHOICE_SET_MODEL: self._set_model,
+            CHOICE_SHOW_DOCUMENT: self._show_document,
+        }
+
+    @property
+    def collection(self) -> list[Document]:
+        return self._collection
+
+    @collection.setter
+    def collection(self, collection: list[Document]):
+        """
+        Replaces the document collection and rebuilds the lookup table from document ID to document.
+        """
+        self._collection = collection
+        self._documents_by_id = {document.document_id: document for document in collection}
+        self._invalidate_caches()
+
+    def _invalidate_caches(self):
+        """
+        Drops all data derived from the collection; called whenever its documents or their terms change.
+        """
+        self._representation_cache = {}  # Maps (stop_word_filtering, stemming) to the document representations.
+        self._representation_model = None  # The model the cached representations belong to.
+        self._signature_key = None  # (model, stop_word_filtering, stemming) the current signatures were built for.
+        self.inverted_list = None  # Inverted list of the collection, built on the first inverted list search.
+        self._search_results = OrderedDict()  # LRU cache: (query, stemming, stop_word_filtering, output_k) -> results.
+        self._search_results_model = None  # The model the cached search results belong to.
 
     def main_menu(self):
         """
@@ -85,139 +130,11 @@ class InformationRetrievalSystem(object):
             print(f'{CHOICE_EXIT} - Exit')
             action_choice = int(input('Enter choice: '))
 
-            if action_choice == CHOICE_LIST:
-                # List documents in CLI.
-                if self.collection:
-                    for document in self.collection:
-                        print(document)
-                else:
-                    print('No documents.')
-                print()
-
-            elif action_choice == CHOICE_SEARCH:
-                # Read a query string from the CLI and search for it.
-
-                # Determine desired search parameters:
-                SEARCH_NORMAL, SEARCH_SW, SEARCH_STEM, SEARCH_SW_STEM = 1, 2, 3, 4
-                print('Search options:')
-                print(f'{SEARCH_NORMAL} - Standard search (default)')
-                print(f'{SEARCH_SW} - Search documents with removed stopwords')
-                print(f'{SEARCH_STEM} - Search documents with stemmed terms')
-                print(f'{SEARCH_SW_STEM} - Search documents with removed stopwords AND stemmed terms')
-                search_mode = int(input('Enter choice: '))
-                stop_word_filtering = (search_mode == SEARCH_SW) or (search_mode == SEARCH_SW_STEM)
-                stemming = (search_mode == SEARCH_STEM) or (search_mode == SEARCH_SW_STEM)
-
-                # Actual query processing begins here:
-                query = input('Query: ').lower()  # Convert query to lower case
-                if stemming:
-                    query = porter.stem_query_terms(query)
-                
-                #For measuring taken time for query processing
-                start_time = time.time()
-
-                if isinstance(self.model, models.InvertedListBooleanModel):
-                    results = self.inverted_list_search(query, stemming, stop_word_filtering)
-                elif isinstance(self.model, models.VectorSpaceModel):
-                    results = self.buckley_lewit_search(query, stemming, stop_word_filtering)
-                elif isinstance(self.model, models.SignatureBasedBooleanModel):
-                    results = self.signature_search(query, stemming, stop_word_filtering)
-                else:
-                    results = self.basic_query_search(query, stemming, stop_word_filtering)
-                
-                end_time = time.time()
-
-                # Output of results:
-                #print(f'\nTotal results: {len(results)}\n')  #Show total number of results
-
-                for index, (score, document) in enumerate(results, start=1):  # Enumerate to number the results
-                    print(f' {score}: {document}')
-
-                # Output of quality metrics:
-                print()
-                print(f'precision: {self.calculate_precision(query,results)}')
-                print(f'recall: {self.calculate_recall(query,results)}')
-                print(f'query processing time: {(end_time - start_time) * 1000} ms')  # Printing the query processing time in ms
-
-            elif action_choice == CHOICE_EXTRACT:
-                # Extract document collection from text file.
-
-                raw_collection_file = os.path.join(RAW_DATA_PATH, 'aesopa10.txt')
-                self.collection = extraction.extract_collection(raw_collection_file)
-                assert isinstance(self.collection, list)
-                assert all(isinstance(d, Document) for d in self.collection)
-
-                if input('Should stopwords be filtered? [y/N]: ') == 'y':
-                    cleanup.filter_collection(self.collection,STOPWORD_FILE_PATH)
-
-                if input('Should stemming be performed? [y/N]: ') == 'y':
-                    porter.stem_all_docs(self.collection)
-
-                extraction.save_collection_as_json(self.collection, COLLECTION_PATH)
-                print('Done.\n')
-
-            elif action_choice == CHOICE_UPDATE_STOP_WORDS:
-                # Rebuild the stop word list, using one out of two methods.
-
-                print('Available options:')
-                print(f'{SW_METHOD_LIST} - Load stopword list from file')
-                print(f"{SW_METHOD_CROUCH} - Generate stopword list using Crouch's method")
-
-                method_choice = int(input('Enter choice: '))
-                if method_choice in (SW_METHOD_LIST, SW_METHOD_CROUCH):
-                    # Load stop words using the desired method:
-                    if method_choice == SW_METHOD_LIST:
-                        self.stop_word_list = cleanup.load_stop_word_list(os.path.join(RAW_DATA_PATH, 'englishST.txt'))
-                        print('Done.\n')
-                    elif method_choice == SW_METHOD_CROUCH:
-                        self.stop_word_list = cleanup.create_stop_word_list_by_frequency(self.collection)
-                        print('Done.\n')
-
-                    # Save new stopword list into file:
-                    with open(STOPWORD_FILE_PATH, 'w') as f:
-                        json.dump(self.stop_word_list, f)
-                else:
-                    print('Invalid choice.')
-
-            elif action_choice == CHOICE_SET_MODEL:
-                # Choose and set the retrieval model to use for searches.
-
-                print()
-                print('Available models:')
-                print(f'{MODEL_BOOL_LIN} - Boolean model with linear search')
-                print(f'{MODEL_BOOL_INV} - Boolean model with inverted lists')
-                print(f'{MODEL_BOOL_SIG} - Boolean model with signature-based search')
-                print(f'{MODEL_FUZZY} - Fuzzy set model')
-                print(f'{MODEL_VECTOR} - Vector space model')
-                model_choice = int(input('Enter choice: '))
-                if model_choice == MODEL_BOOL_LIN:
-                    self.model = models.LinearBooleanModel()
-                elif model_choice == MODEL_BOOL_INV:
-                    self.model = models.InvertedListBooleanModel()
-                elif model_choice == MODEL_BOOL_SIG:
-                    self.model = models.SignatureBasedBooleanModel()
-                elif model_choice == MODEL_FUZZY:
-                    self.model = models.FuzzySetModel()
-                elif model_choice == MODEL_VECTOR:
-                    self.model = models.VectorSpaceModel()
-                else:
-                    print('Invalid choice.')
-
-            elif action_choice == CHOICE_SHOW_DOCUMENT:
-                target_id = int(input('ID of the desired document:'))
-                found = False
-                for document in self.collection:
-                    if document.document_id == target_id:
-                        print(document.title)
-                        print('-' * len(document.title))
-                        print(document.raw_text)
-                        found = True
-
-                if not found:
-                    print(f'Document #{target_id} not found!')
-
-            elif action_choice == CHOICE_EXIT:
+            action = self._menu_actions.get(action_choice)
+            if action_choice == CHOICE_EXIT:
                 break
+            elif action is not None:
+                action()
             else:
                 print('Invalid choice.')
 
@@ -225,6 +142,170 @@ class InformationRetrievalSystem(object):
             input('Press ENTER to continue...')
             print()
 
+    def _list_documents(self):
+        """
+        Lists all documents of the collection.
+        """
+        if self.collection:
+            for document in self.collection:
+                print(document)
+        else:
+            print('No documents.')
+        print()
+
+    def _search(self):
+        """
+        Reads a query string from the CLI, searches for it and prints results and quality metrics.
+        """
+        # Determine desired search parameters:
+        SEARCH_NORMAL, SEARCH_SW, SEARCH_STEM, SEARCH_SW_STEM = 1, 2, 3, 4
+        print('Search options:')
+        print(f'{SEARCH_NORMAL} - Standard search (default)')
+        print(f'{SEARCH_SW} - Search documents with removed stopwords')
+        print(f'{SEARCH_STEM} - Search documents with stemmed terms')
+        print(f'{SEARCH_SW_STEM} - Search documents with removed stopwords AND stemmed terms')
+        search_mode = int(input('Enter choice: '))
+        stop_word_filtering = (search_mode == SEARCH_SW) or (search_mode == SEARCH_SW_STEM)
+        stemming = (search_mode == SEARCH_STEM) or (search_mode == SEARCH_SW_STEM)
+
+        # Actual query processing begins here:
+        query = input('Query: ').lower()  # Convert query to lower case
+        if stemming:
+            query = porter.stem_query_terms(query)
+
+        #For measuring taken time for query processing
+        start_time = time.time()
+
+        results = self._cached_search(query, stemming, stop_word_filtering)
+
+        end_time = time.time()
+
+        # Output of results:
+        #print(f'\nTotal results: {len(results)}\n')  #Show total number of results
+
+        for index, (score, document) in enumerate(results, start=1):  # Enumerate to number the results
+            print(f' {score}: {document}')
+
+        # Output of quality metrics:
+        print()
+        print(f'precision: {self.calculate_precision(query,results)}')
+        print(f'recall: {self.calculate_recall(query,results)}')
+        print(f'query processing time: {(end_time - start_time) * 1000} ms')  # Printing the query processing time in ms
+
+    def _cached_search(self, query: str, stemming: bool, stop_word_filtering: bool) -> list:
+        """
+        Searches with the search method of the current model. Results of repeated queries are served from a bounded
+        LRU cache, which is dropped whenever the model or the collection changes.
+        :param query: Query string
+        :param stemming: Controls, whether stemming is used
+        :param stop_word_filtering: Controls, whether stop-words are ignored in the search
+        :return: List of (score, document) tuples
+        """
+        if self._search_results_model is not self.model:
+            self._search_results.clear()  # Do not keep discarded models (and their indexes) alive
+            self._search_results_model = self.model
+
+        key = (query, stemming, stop_word_filtering, self.output_k)
+        results = self._search_results.get(key)
+        if results is not None:
+            self._search_results.move_to_end(key)
+            return list(results)
+
+        if isinstance(self.model, models.InvertedListBooleanModel):
+            results = self.inverted_list_search(query, stemming, stop_word_filtering)
+        elif isinstance(self.model, models.VectorSpaceModel):
+            results = self.buckley_lewit_search(query, stemming, stop_word_filtering)
+        elif isinstance(self.model, models.SignatureBasedBooleanModel):
+            results = self.signature_search(query, stemming, stop_word_filtering)
+        else:
+            results = self.basic_query_search(query, stemming, stop_word_filtering)
+
+        self._search_results[key] = list(results)
+        if len(self._search_results) > RESULT_CACHE_SIZE:
+            self._search_results.popitem(last=False)  # Evict the least recently used entry
+        return results
+
+    def _build_collection(self):
+        """
+        Extracts the document collection from the raw text file and saves it.
+        """
+        raw_collection_file = os.path.join(RAW_DATA_PATH, 'aesopa10.txt')
+        self.collection = extraction.extract_collection(raw_collection_file)
+        assert isinstance(self.collection, list)
+        assert all(isinstance(d, Document) for d in self.collection)
+
+        if input('Should stopwords be filtered? [y/N]: ') == 'y':
+            cleanup.filter_collection(self.collection, self.stop_word_list)
+
+        if input('Should stemming be performed? [y/N]: ') == 'y':
+            porter.stem_all_docs(self.collection)
+        self._invalidate_caches()  # Filtering and stemming changed the terms in place.
+
+        extraction.save_collection_as_json(self.collection, COLLECTION_PATH)
+        print('Done.\n')
+
+    def _rebuild_stop_word_list(self):
+        """
+        Rebuilds the stop word list, using one out of two methods.
+        """
+        print('Available options:')
+        print(f'{SW_METHOD_LIST} - Load stopword list from file')
+        print(f"{SW_METHOD_CROUCH} - Generate stopword list using Crouch's method")
+
+        method_choice = int(input('Enter choice: '))
+        if method_choice in (SW_METHOD_LIST, SW_METHOD_CROUCH):
+            # Load stop words using the desired method:
+            if method_choice == SW_METHOD_LIST:
+                self.stop_word_list = cleanup.load_stop_word_list(os.path.join(RAW_DATA_PATH, 'englishST.txt'))
+                print('Done.\n')
+            elif method_choice == SW_METHOD_CROUCH:
+                self.stop_word_list = cleanup.create_stop_word_list_by_frequency(self.collection)
+                print('Done.\n')
+
+            # Save new stopword list into file:
+            with open(STOPWORD_FILE_PATH, 'w') as f:
+                json.dump(sorted(self.stop_word_list), f)
+        else:
+            print('Invalid choice.')
+
+    def _set_model(self):
+        """
+        Chooses and sets the retrieval model to use for searches.
+        """
+        print()
+        print('Available models:')
+        print(f'{MODEL_BOOL_LIN} - Boolean model with linear search')
+        print(f'{MODEL_BOOL_INV} - Boolean model with inverted lists')
+        print(f'{MODEL_BOOL_SIG} - Boolean model with signature-based search')
+        print(f'{MODEL_FUZZY} - Fuzzy set model')
+        print(f'{MODEL_VECTOR} - Vector space model')
+        model_choice = int(input('Enter choice: '))
+        if model_choice == MODEL_BOOL_LIN:
+            self.model = models.LinearBooleanModel()
+        elif model_choice == MODEL_BOOL_INV:
+            self.model = models.InvertedListBooleanModel()
+        elif model_choice == MODEL_BOOL_SIG:
+            self.model = models.SignatureBasedBooleanModel()
+        elif model_choice == MODEL_FUZZY:
+            self.model = models.FuzzySetModel()
+        elif model_choice == MODEL_VECTOR:
+            self.model = models.VectorSpaceModel()
+        else:
+            print('Invalid choice.')
+
+    def _show_document(self):
+        """
+        Shows a specific document by its ID.
+        """
+        target_id = int(input('ID of the desired document:'))
+        document = self._documents_by_id.get(target_id)
+        if document is not None:
+            print(document.title)
+            print('-' * len(document.title))
+            print(document.raw_text)
+        else:
+            print(f'Document #{target_id} not found!')
+
     def basic_query_search(self, query: str, stemming: bool, stop_word_filtering: bool) -> list:
         """
         Searches the collection for a query string. This method is "basic" in that it does not use any special algorithm
@@ -237,12 +318,57 @@ class InformationRetrievalSystem(object):
         document
         """
         query_representation = self.model.query_to_representation(query)
-        document_representations = [self.model.document_to_representation(d, stop_word_filtering, stemming)
-                                    for d in self.collection]
+        document_representations = self._document_representations(stop_word_filtering, stemming)
         scores = [self.model.match(dr, query_representation) for dr in document_representations]
-        ranked_collection = sorted(zip(scores, self.collection), key=lambda x: x[0], reverse=True)
-        results = [result for result in ranked_collection if result[0] > 0]
-        return results
+        return self._rank(zip(scores, self.collection))
+
+    def _rank(self, scored_documents) -> list:
+        """
+        Ranks (score, document) pairs by descending score and drops all documents without a positive score. Only the
+        matching documents are sorted; if output_k is set, a heap selects the top k instead of sorting.
+        :param scored_documents: Iterable of (score, document) tuples
+        :return: List of (score, document) tuples, best match first
+        """
+        matches = [result for result in scored_documents if result[0] > 0]
+        if self.output_k is None:
+            return sorted(matches, key=itemgetter(0), reverse=True)
+        return heapq.nlargest(self.output_k, matches, key=itemgetter(0))
+
+    def _rank_scores(self, scores: np.ndarray) -> list:
+        """
+        Vectorized version of _rank() for an array with the score of every document of the collection. If output_k is
+        set, a partition selects the candidates for the top k, so that only those are sorted.
+        :param scores: Array of scores, in collection order
+        :return: List of (score, document) tuples, best match first
+        """
+        matches = np.flatnonzero(scores > 0)
+        if self.output_k is not None and self.output_k < len(matches):
+            # Keep every document scoring at least the k-th best score, so that ties are resolved as in _rank()
+            kth_score = -np.partition(-scores[matches], self.output_k - 1)[self.output_k - 1]
+            matches = matches[scores[matches] >= kth_score]
+        # A stable sort keeps documents with equal scores in collection order
+        matches = matches[np.argsort(-scores[matches], kind='stable')][:self.output_k]
+        return [(score, self.collection[doc_id]) for score, doc_id in zip(scores[matches].tolist(), matches.tolist())]
+
+    def _document_representations(self, stop_word_filtering: bool, stemming: bool) -> list:
+        """
+        Returns the representations of all documents for the current model. They are computed once per combination of
+        search options and reused until the model or the collection changes.
+        :param stop_word_filtering: Controls, whether stop-words are ignored in the search
+        :param stemming: Controls, whether stemming is used
+        :return: List of document representations, in collection order
+        """
+        if self._representation_model is not self.model:
+            self._representation_cache.clear()
+            self._representation_model = self.model
+
+        key = (stop_word_filtering, stemming)
+        representations = self._representation_cache.get(key)
+        if representations is None:
+            representations = [self.model.document_to_representation(d, stop_word_filtering, stemming)
+                               for d in self.collection]
+            self._representation_cache[key] = representations
+        return representations
 
     def inverted_list_search(self, query: str, stemming: bool, stop_word_filtering: bool) -> list:
         """
@@ -253,76 +379,65 @@ class InformationRetrievalSystem(object):
         :return: List of tuples, where the first element is the relevance score and the second the corresponding
         document
         """
-        if not hasattr(self, 'inverted_list') or self.inverted_list is None:
+        if self.inverted_list is None:
             self.inverted_list = models.InvertedListBooleanModel()
             self.inverted_list.build_inverted_list(self.collection)
 
         doc_ids = self.inverted_list.search(query)
-        results = [(1, self.collection[doc_id]) for doc_id in doc_ids]
-        return results
+        return [(1, self.collection[doc_id]) for doc_id in doc_ids]
 
     def buckley_lewit_search(self, query: str, stemming: bool, stop_word_filtering: bool) -> list:
         if isinstance(self.model, models.VectorSpaceModel):
             if not self.model.document_vectors:
                 self.model.build_inverted_index(self.collection)
             query_representation = self.model.query_to_representation(query)
-            scores = [(self.model.match(self.model.document_vectors[doc_id], query_representation), doc)
-                    for doc_id, doc in enumerate(self.collection)]
-            ranked_collection = sorted(scores, key=lambda x: x[0], reverse=True)
-            results = [result for result in ranked_collection if result[0] > 0]
-            return results
+            return self._rank_scores(self.model.match_all(query_representation))
 
 
     def signature_search(self, query: str, stemming: bool, stop_word_filtering: bool) -> list:
         
         if isinstance(self.model, models.SignatureBasedBooleanModel):
-            # Ensure signatures are created for all documents if not already created
-            if not self.model.signatures:
-                for document in self.collection:
-                    self.model.document_to_representation(document, stop_word_filtering, stemming)
-            
+            # (Re)build the signatures of all documents once per model, collection and search options
+            signature_key = (self.model, stop_word_filtering, stemming)
+            if self._signature_key != signature_key:
+                self.model.build_signatures(self.collection, stop_word_filtering, stemming)
+                self._signature_key = signature_key
+
             # Perform the search using the signature-based method
             results = self.model.search(query)
             return [(1, doc) for doc in results]   
 
-    def calculate_precision(self, query: str, result_list: list[tuple]) -> float:
-        # Split the query on logical operators if needed
-        query_terms = re.split(r'[&|\-]', query)
-        
+    def _relevant_documents(self, query: str) -> set:
+        """
+        Returns the IDs of all documents that the ground truth lists as relevant for any term of the query. This costs
+        only a few dictionary lookups, so the result is not cached.
+        :param query: Query string, may contain logical operators
+        :return: Set of relevant document IDs
+        """
         relevant_docs = set()
-        for term in query_terms:
+        for term in QUERY_OPERATOR_PATTERN.split(query):
             term = term.strip()  # Clean up any spaces
             if term in self.ground_truth:
                 relevant_docs.update(self.ground_truth[term])
-    
-        retrieved_docs = set(doc.document_id for score, doc in result_list)
-        true_positives = relevant_docs & retrieved_docs
-    
-        if not retrieved_docs:
+        return relevant_docs
+
+    def calculate_precision(self, query: str, result_list: list[tuple]) -> float:
+        if not result_list:
             return -1
-    
-        precision = len(true_positives) / len(retrieved_docs)
-        return precision
-    
+
+        # Each document is retrieved at most once, so one pass over the results counts the true positives.
+        relevant_docs = self._relevant_documents(query)
+        true_positives = sum(1 for score, doc in result_list if doc.document_id in relevant_docs)
+        return true_positives / len(result_list)
+
     def calculate_recall(self, query: str, result_list: list[tuple]) -> float:
-        # Split the query on logical operators if needed
-        query_terms = re.split(r'[&|\-]', query)
-        
-        relevant_docs = set()
-        for term in query_terms:
-            term = term.strip()  # Clean up any spaces
-            if term in self.ground_truth:
-                relevant_docs.update(self.ground_truth[term])
-    
-        retrieved_docs = set(doc.document_id for score, doc in result_list)
-        true_positives = relevant_docs & retrieved_docs
-    
+        relevant_docs = self._relevant_documents(query)
         if not relevant_docs:
             return -1
-    
-        recall = len(true_positives) / len(relevant_docs)
-        return recall
-    
+
+        true_positives = sum(1 for score, doc in result_list if doc.document_id in relevant_docs)
+        return true_positives / len(relevant_docs)
+
 
 if __name__ == '__main__':
     irs = InformationRetrievalSystem()
@@ -1,10 +1,136 @@
 from abc import ABC, abstractmethod
 from document import Document
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
+from functools import lru_cache
+import operator
 import re
 import hashlib
 import numpy as np
-import math
+import sys
+
+QUERY_SIGNATURE_CACHE_SIZE = 1024  # Number of query signatures a signature model keeps in its LRU cache
+
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)  # Set bits of every byte value
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """
+    Counts the set bits of every element of an unsigned integer array.
+    """
+    if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0
+        return np.bitwise_count(words)
+    as_bytes = words.view(np.uint8).reshape(words.shape + (words.itemsize,))
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=-1)
+
+
+# Query tokens: an operator/parenthesis, or a run of other characters without surrounding whitespace. findall() with
+# these patterns yields exactly the stripped, non-empty pieces of re.split() on the operators, in a single scan.
+_QUERY_TOKEN = re.compile(r'[()&|\-]|[^()&|\-\s](?:[^()&|\-]*[^()&|\-\s])?')
+_SIGNATURE_QUERY_TOKEN = re.compile(r'[()&|]|[^()&|\s](?:[^()&|]*[^()&|\s])?')  # '-' is not split off here
+
+
+# Opcodes of compiled Boolean queries; also the index of the matching callable in the operations of _evaluate_query
+_OP_TERM, _OP_AND, _OP_OR, _OP_NOT = range(4)
+_BINARY_OPCODES = {'&': _OP_AND, '|': _OP_OR}
+_PRECEDENCE = {_OP_OR: 1, _OP_AND: 2, _OP_NOT: 3}
+
+
+@lru_cache(maxsize=10_000)
+def _compile_query(tokens: tuple) -> tuple:
+    """
+    Converts the infix tokens of a Boolean query into a postfix program of (opcode, term) pairs, using the
+    shunting-yard algorithm. '-' binds tighter than '&', which binds tighter than '|'; binary operators are evaluated
+    from left to right and parentheses group. Double negations cancel out already here. Programs are cached, so a
+    repeated query is parsed only once.
+    :param tokens: Query tokens, as returned by a model's tokenizer
+    :return: Tuple of (opcode, term) pairs; term is None for operators
+    """
+    program = []
+    operators = []  # Pending opcodes and '(' markers
+
+    def emit(opcode):
+        # Two consecutive NOTs in postfix apply to the same operand, so "- - x" is just x
+        if opcode == _OP_NOT and program and program[-1][0] == _OP_NOT:
+            program.pop()
+        else:
+            program.append((opcode, None))
+
+    for token in tokens:
+        if token in _BINARY_OPCODES:
+            opcode = _BINARY_OPCODES[token]
+            while operators and operators[-1] != '(' and _PRECEDENCE[operators[-1]] >= _PRECEDENCE[opcode]:
+                emit(operators.pop())
+            operators.append(opcode)
+        elif token == '-':
+            operators.append(_OP_NOT)
+        elif token == '(':
+            operators.append('(')
+        elif token == ')':
+            while operators and operators[-1] != '(':
+                emit(operators.pop())
+            if operators:
+                operators.pop()  # Pop the matching '('
+        else:
+            program.append((_OP_TERM, token))
+    while operators:
+        operator = operators.pop()
+        if operator != '(':
+            emit(operator)
+    return tuple(program)
+
+
+def _evaluate_query(program: tuple, operations: tuple):
+    """
+    Evaluates a compiled Boolean query. Operators that lack operands are skipped.
+    :param program: Postfix program, as returned by _compile_query()
+    :param operations: Callables (fetch(term), intersect(left, right), union(left, right), negate(operand)), indexed by
+    opcode
+    :return: Result of the query, or None for an empty query
+    """
+    stack = []
+    for opcode, term in program:
+        if opcode == _OP_TERM:
+            stack.append(operations[_OP_TERM](term))
+        elif opcode == _OP_NOT:
+            if stack:
+                stack.append(operations[_OP_NOT](stack.pop()))
+        elif len(stack) >= 2:
+            right = stack.pop()
+            stack.append(operations[opcode](stack.pop(), right))
+    return stack[-1] if stack else None
+
+
+def _document_terms(document: Document, stopword_filtering=False, stemming=False) -> list[str]:
+    """
+    Selects the terms of a document that the search options ask for (stemmed terms take precedence).
+    """
+    if stemming:
+        return document.stemmed_terms
+    if stopword_filtering:
+        return document.filtered_terms
+    return document.terms
+
+
+def _term_counts(terms) -> Counter:
+    """
+    Counts the lower case forms of the given terms. The terms are counted first, so every distinct term is lowercased
+    (and interned) only once instead of once per occurrence.
+    """
+    counts = Counter()
+    for term, count in Counter(terms).items():
+        counts[sys.intern(term.lower())] += count
+    return counts
+
+
+def _norms(vectors: np.ndarray) -> np.ndarray:
+    """
+    Returns the L2 norm of a vector (or of every row of a matrix, as a column) for dividing by it; zero norms are
+    replaced by 1 so that zero vectors stay zero.
+    """
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return norms
+
 
 class RetrievalModel(ABC):
     @abstractmethod
@@ -19,101 +145,46 @@ class RetrievalModel(ABC):
     def match(self, document_representation, query_representation) -> float:
         pass
 
-from collections import Counter
-import re
 
 class LinearBooleanModel(RetrievalModel):
     def __init__(self):
         self.documents = []  # Store all documents
+        self._all_docs = frozenset()  # IDs of all stored documents, the universe of the NOT operator
 
     def document_to_representation(self, document: Document, stopword_filtering=False, stemming=False):
         """
         Converts a document into a representation suitable for Boolean retrieval.
         """
-        if stopword_filtering:
-            terms = document.filtered_terms
-        else:
-            terms = document.terms
-
-        if stemming:
-            terms = document.stemmed_terms
+        terms = _document_terms(document, stopword_filtering, stemming)
 
-        term_counter = Counter(term.lower() for term in terms)  # Convert terms to lower case
-        return {term: 1 for term in term_counter}
+        # Convert terms to lower case; only their presence matters, so each distinct term is lowercased just once
+        return frozenset(map(str.lower, set(terms)))
 
     def query_to_representation(self, query: str):
         """
         Converts a query into a list of tokens, splitting on logical operators.
         """
-        tokens = re.split(r'(\(|\)|\&|\||\-)', query.lower())  # Split by AND, OR, NOT operators and parentheses
-        return [token.strip() for token in tokens if token.strip()]  # Remove any empty tokens or spaces
+        return _QUERY_TOKEN.findall(query.lower())  # Split by AND, OR, NOT operators and parentheses
 
     def match(self, document_representation, query_representation) -> float:
-       # Ensure both representations are dictionaries or convert them if they are lists
-       if isinstance(document_representation, list):
-           document_representation = {term: 1 for term in document_representation}  # Convert to dictionary
-       
-       if isinstance(query_representation, list):
-           query_representation = {term: 1 for term in query_representation}  # Convert to dictionary
-   
-       # Now proceed with matching
-       common_terms = set(document_representation.keys()).intersection(query_representation.keys())
-       return len(common_terms)  # Return the count of common terms
-   
+        # Ensure the document representation is a set or convert it if it is a list
+        if isinstance(document_representation, list):
+            document_representation = frozenset(document_representation)
+
+        # Count the distinct query terms that occur in the document; intersection() probes the document set with the
+        # (few) query terms instead of building a set of all document terms
+        return len(document_representation.intersection(query_representation))
 
     def search(self, query: str):
         """
         Searches for documents that match the given query, handling logical operators.
         """
         tokens = self.query_to_representation(query)  # Tokenize the query
-        result_stack = []
-        operator_stack = []  # Stack to hold operators like &, |, and -
-
-        def apply_operator():
-            """ Helper function to apply the operator on top of the operator stack to the result stack. """
-            if len(result_stack) < 2 and operator_stack[-1] != '-':
-                return set()  # Not enough operands for binary operators
-            right = result_stack.pop() if operator_stack[-1] != '-' else None
-            left = result_stack.pop() if right else result_stack.pop()
-
-            operator = operator_stack.pop()
-
-            if operator == '&':
-                result_stack.append(left.intersection(right))  # AND operation
-            elif operator == '|':
-                result_stack.append(left.union(right))  # OR operation
-            elif operator == '-':
-                result_stack.append(self._negate_set(left))  # NOT operation (negation of left)
-
-        for token in tokens:
-            if token == '&' or token == '|':
-                # Apply the last operator if it's already present
-                while operator_stack and operator_stack[-1] in ('&', '|'):
-                    apply_operator()
-                operator_stack.append(token)
-            elif token == '-':
-                # Negation (NOT) operator; no need to check stack size before
-                operator_stack.append(token)
-            elif token == '(':
-                operator_stack.append(token)  # Push the opening parenthesis
-            elif token == ')':
-                # Apply all operators until the matching '(' is found
-                while operator_stack and operator_stack[-1] != '(':
-                    apply_operator()
-                operator_stack.pop()  # Pop the '(' from the stack
-            else:
-                # It's a term, get the set of document IDs containing the term
-                result_stack.append(self._get_matching_docs(token))
-
-        # After all tokens, apply any remaining operators
-        while operator_stack:
-            apply_operator()
-
-        # Final check after processing all tokens
-        if not result_stack:
+        # operator.and_/or_ accept both sets and the frozensets returned by _negate_set()
+        operations = (self._get_matching_docs, operator.and_, operator.or_, self._negate_set)
+        final_result = _evaluate_query(_compile_query(tuple(tokens)), operations)
+        if final_result is None:
             return []  # If nothing is on the stack, return no matches
-
-        final_result = result_stack.pop()
         return [self.documents[doc_id] for doc_id in final_result]  # Return the documents that matched
 
     def _get_matching_docs(self, term):
@@ -130,8 +201,10 @@ class LinearBooleanModel(RetrievalModel):
         """
         Returns the complement of the matching documents (i.e., all documents that don't match).
         """
-        all_docs = set(range(len(self.documents)))  # All document IDs
-        return all_docs - matching_docs  # Documents that don't match
+        # The set of all document IDs is built once per collection size instead of on every NOT
+        if len(self._all_docs) != len(self.documents):
+            self._all_docs = frozenset(range(len(self.documents)))
+        return self._all_docs - matching_docs  # Documents that don't match
 
     def add_document(self, document: Document, stopword_filtering=False, stemming=False):
         """
@@ -145,42 +218,38 @@ class LinearBooleanModel(RetrievalModel):
 
 class InvertedListBooleanModel(RetrievalModel):
     def __init__(self):
-        self.inverted_index = {}
-        self.all_docs = set()
+        self.inverted_index = {}  # Maps each term to the sorted array of the IDs of the documents that contain it
+        self.all_docs = np.empty(0, dtype=np.int32)
 
     def build_inverted_list(self, documents):
         """
-        Builds an inverted list (index) from the given collection of documents.
+        Builds an inverted list (index) from the given collection of documents. Posting lists are stored as sorted
+        int32 arrays, so that the Boolean operators become linear merges in NumPy.
         """
+        postings = defaultdict(list)
         for doc_id, document in enumerate(documents):
-            self.all_docs.add(doc_id)
-            for term in document.terms:
-                term = term.lower()  # Convert term to lower case
-                if term not in self.inverted_index:
-                    self.inverted_index[term] = set()
-                self.inverted_index[term].add(doc_id)
+            # Convert each distinct term to lower case once; interned so that the index keys are shared strings
+            for term in {sys.intern(term.lower()) for term in set(document.terms)}:
+                postings[term].append(doc_id)  # Documents are visited in order, so every list stays sorted
+
+        self.inverted_index = {term: np.array(doc_ids, dtype=np.int32) for term, doc_ids in postings.items()}
+        self.all_docs = np.arange(len(documents), dtype=np.int32)
 
     def document_to_representation(self, document: Document, stopword_filtering=False, stemming=False):
         """
         Converts a document into a representation (just adds terms to the inverted list).
         """
-        if stopword_filtering:
-            terms = document.filtered_terms
-        else:
-            terms = document.terms
-
-        if stemming:
-            terms = document.stemmed_terms
+        terms = _document_terms(document, stopword_filtering, stemming)
 
-        term_counter = Counter(term.lower() for term in terms)  # Convert terms to lower case
-        return {term: 1 for term in term_counter}  # Each term is represented by 1 (binary presence)
+        # Convert terms to lower case, each distinct term only once
+        return dict.fromkeys(map(str.lower, set(terms)), 1)  # Each term is represented by 1 (binary presence)
 
     def query_to_representation(self, query: str):
         """
         Converts a query into a tokenized form, splitting on logical operators.
         """
-        tokens = re.split(r'(\(|\)|\&|\||\-)', query.lower())  # Split by AND, OR, NOT operators and parentheses
-        return [token.strip() for token in tokens if token.strip()]  # Remove any empty tokens or spaces
+        # Split by AND, OR, NOT operators and parentheses; interned, so that probing the index keys compares by identity
+        return list(map(sys.intern, _QUERY_TOKEN.findall(query.lower())))
 
     def match(self, document_representation, query_representation) -> float:
         """
@@ -198,172 +267,240 @@ class InvertedListBooleanModel(RetrievalModel):
         Searches for documents that match the given query, handling logical operators.
         """
         tokens = self.query_to_representation(query.lower())  # Tokenize the query
-        result_stack = []
-        operator_stack = []  # Stack to hold operators like &, |, and -
-    
-        def apply_operator():
-            """ Helper function to apply the operator on top of the operator stack to the result stack. """
-            if len(result_stack) < 2 and operator_stack[-1] != '-':
-                return []  # Not enough operands for binary operators
-            right = result_stack.pop() if operator_stack[-1] != '-' else None
-            left = result_stack.pop() if right else result_stack.pop()
-            
-            operator = operator_stack.pop()
-    
-            if operator == '&':
-                result_stack.append(left & right)
-            elif operator == '|':
-                result_stack.append(left | right)
-            elif operator == '-':
-                result_stack.append(self.all_docs - left)
-    
-        for token in tokens:
-            if token == '&' or token == '|':
-                # Apply the last operator if it's already present
-                while operator_stack and operator_stack[-1] in ('&', '|'):
-                    apply_operator()
-                operator_stack.append(token)
-            elif token == '-':
-                # Negation (NOT) operator; no need to check stack size before
-                operator_stack.append(token)
-            else:
-                # It's a term, get the set of documents containing the term
-                if token in self.inverted_index:
-                    result_stack.append(self.inverted_index[token])
-                else:
-                    result_stack.append(set())  # Empty set if the term is not in the inverted index
-    
-        # After all tokens, apply any remaining operators
-        while operator_stack:
-            apply_operator()
-    
-        # Final check after processing all tokens
-        if not result_stack:
+        # Intermediate results are (negated, doc_ids) pairs: NOT only flips the flag, and the complement against all
+        # documents is materialized once at the end, if at all
+        operations = (self._get_postings, self._intersect, self._unite, lambda operand: (not operand[0], operand[1]))
+        result = _evaluate_query(_compile_query(tuple(tokens)), operations)
+        if result is None:
             return []  # If nothing is on the stack, return no matches
-    
-        return result_stack.pop()
-    
-        def __str__(self):
-            return 'Boolean Model (Inverted List)'
-    
+        negated, doc_ids = result
+        return np.setdiff1d(self.all_docs, doc_ids, assume_unique=True) if negated else doc_ids
+
+    def _get_postings(self, term):
+        """
+        Returns the (sorted) IDs of the documents containing the term; no documents if it is not in the inverted index.
+        """
+        postings = self.inverted_index.get(term)
+        return False, postings if postings is not None else self.all_docs[:0]
+
+    @staticmethod
+    def _contains(doc_ids, candidates):
+        """
+        Checks which candidates occur in the sorted doc_ids array by binary search, i.e. in O(|candidates| log
+        |doc_ids|) instead of merging both lists completely.
+        :return: Boolean array with one entry per candidate
+        """
+        if not len(doc_ids):
+            return np.zeros(len(candidates), dtype=bool)
+        positions = np.minimum(np.searchsorted(doc_ids, candidates), len(doc_ids) - 1)
+        return doc_ids[positions] == candidates
+
+    @classmethod
+    def _intersect(cls, left, right):
+        """
+        AND of two (negated, doc_ids) results; a negated operand is subtracted instead of being complemented. The
+        shorter posting list is always the one looked up in the longer one.
+        """
+        (left_negated, left_ids), (right_negated, right_ids) = left, right
+        # Nothing can match if either operand matches no document (e.g. a term that is not in the index)
+        if not left_negated and not len(left_ids):
+            return left
+        if not right_negated and not len(right_ids):
+            return right
+        if not left_negated and not right_negated:
+            smaller, larger = sorted((left_ids, right_ids), key=len)
+            return False, smaller[cls._contains(larger, smaller)]
+        if not left_negated:
+            return False, left_ids[~cls._contains(right_ids, left_ids)]  # A & -B = A - B
+        if not right_negated:
+            return False, right_ids[~cls._contains(left_ids, right_ids)]  # -A & B = B - A
+        return True, np.union1d(left_ids, right_ids)  # -A & -B = -(A | B)
+
+    @classmethod
+    def _unite(cls, left, right):
+        """
+        OR of two (negated, doc_ids) results, using De Morgan's laws for negated operands.
+        """
+        (left_negated, left_ids), (right_negated, right_ids) = left, right
+        if not left_negated and not right_negated:
+            return False, np.union1d(left_ids, right_ids)
+        if not left_negated:
+            return True, right_ids[~cls._contains(left_ids, right_ids)]  # A | -B = -(B - A)
+        if not right_negated:
+            return True, left_ids[~cls._contains(right_ids, left_ids)]  # -A | B = -(A - B)
+        return True, cls._intersect((False, left_ids), (False, right_ids))[1]  # -A | -B = -(A & B)
+
+    def __str__(self):
+        return 'Boolean Model (Inverted List)'
+
 class SignatureBasedBooleanModel(RetrievalModel):
-    def __init__(self, F=64, D=4):
+    def __init__(self, F=64, D=4, section_length=5):
         self.F = F  # Bit length of the signature
         self.D = D  # Number of hash functions to use
+        # Number of consecutive terms that share one signature; None gives every document (and query) a single
+        # signature, which needs a correspondingly larger F (e.g. 4096) to keep false positives low
+        self.section_length = section_length
         self.documents = []
         self.signatures = []  # This will store a list of signatures for each document
-
-    def _hash_function(self, term, seed):
-        # Hashing function based on term and seed
-        h = hashlib.sha256(term.encode('utf-8') + str(seed).encode('utf-8'))
-        return int(h.hexdigest(), 16) % self.F
-
-    def _create_signature(self, terms):
-        # Create a signature based on a list of terms
-        signature = [0] * self.F
-        for term in terms:
-            term = term.lower()  # Convert term to lower case
+        self._words = -(-F // 64)  # Number of uint64 words a signature is packed into
+        self._term_signatures = {}  # Maps each (lower case) term to its signature, as an integer bit mask
+        # LRU cache: query string -> signatures (they do not depend on the documents); per instance and bounded, so
+        # that it neither keeps discarded models alive nor grows with every distinct query of a session
+        self._query_signatures = OrderedDict()
+        self._signature_matrix = None  # All section signatures packed into rows of uint64 words (built lazily)
+        self._section_documents = None  # Index of the document each row of the signature matrix belongs to
+
+    def _hash_function(self, term):
+        # Hashing function based on the term: the two 64-bit halves of one short, fast BLAKE2b digest serve as the base
+        # hashes h1 and h2 of (enhanced) double hashing, so a term is hashed once instead of once per seed
+        digest = hashlib.blake2b(term.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+
+    def _term_signature(self, term):
+        # Signature of a single term; the D bit positions of every distinct term are computed only once
+        signature = self._term_signatures.get(term)
+        if signature is None:
+            h1, h2 = self._hash_function(term)
+            signature = 0
             for i in range(self.D):
-                pos = self._hash_function(term, i)
-                signature[pos] = 1
+                # Enhanced double hashing (Dillinger & Manolios): the cubic term breaks up the arithmetic progression
+                # of plain h1 + i * h2, which noticeably raised the false positive rate for short signatures
+                signature |= 1 << (h1 + i * h2 + (i ** 3 - i) // 6) % self.F
+            self._term_signatures[term] = signature
         return signature
 
-    def document_to_representation(self, document: Document, stopword_filtering=False, stemming=False):
-        # Get the terms for the document based on filtering and stemming
-        if stopword_filtering:
-            terms = document.filtered_terms
+    def _create_signature(self, terms) -> np.ndarray:
+        """
+        Creates the signature of a list of terms, packed into ceil(F / 64) uint64 words (bit i of the signature is bit
+        i % 64 of word i // 64).
+        """
+        bits = 0
+        for term in terms:
+            bits |= self._term_signature(term.lower())  # Convert term to lower case
+        return self._pack_words([bits])[0]
+
+    def _pack_words(self, bit_masks) -> np.ndarray:
+        """
+        Packs integer bit masks into a matrix with one row of ceil(F / 64) uint64 words per mask.
+        """
+        return np.array([[(bits >> (64 * i)) & 0xFFFFFFFFFFFFFFFF for i in range(self._words)] for bits in bit_masks],
+                        dtype=np.uint64).reshape(-1, self._words)
+
+    def build_signatures(self, documents: list[Document], stopword_filtering=False, stemming=False):
+        """
+        Creates the signatures of all documents in one batch, replacing any previously stored ones. Every distinct term
+        is packed once into a row of a term signature matrix; the section signatures of the whole collection are then
+        OR-reduced from its rows in a single NumPy call instead of term by term.
+        """
+        term_rows = {}  # Maps each (lower case) term to its row in the term signature matrix
+        occurrences = []  # Term signature row of every term occurrence, all documents concatenated
+        section_starts = []  # Index in occurrences where each section starts; sections never span two documents
+        section_counts = []  # Number of sections of every document
+        for document in documents:
+            terms = _document_terms(document, stopword_filtering, stemming)
+            step = self._section_step(terms)
+            section_starts.extend(range(len(occurrences), len(occurrences) + len(terms), step))
+            section_counts.append(-(-len(terms) // step))
+            occurrences.extend(term_rows.setdefault(term.lower(), len(term_rows)) for term in terms)
+
+        term_signatures = self._pack_words([self._term_signature(term) for term in term_rows])
+        if occurrences:
+            section_signatures = np.bitwise_or.reduceat(term_signatures[occurrences], section_starts, axis=0)
         else:
-            terms = document.terms
+            section_signatures = self._stack([])
 
-        if stemming:
-            terms = document.stemmed_terms
+        self.documents = list(documents)
+        self.signatures = np.split(section_signatures, np.cumsum(section_counts)[:-1]) if documents else []
+        self._signature_matrix = None  # Needs to be packed again
+
+    def _section_step(self, terms) -> int:
+        """
+        Returns the number of terms per section for the given term list (all of them without section_length).
+        """
+        return self.section_length or max(len(terms), 1)
+
+    def document_to_representation(self, document: Document, stopword_filtering=False, stemming=False):
+        terms = _document_terms(document, stopword_filtering, stemming)
 
-        # Divide the document terms into sections of 5 terms each
-        sections = [terms[i:i+5] for i in range(0, len(terms), 5)]
-        doc_signatures = []
-        for section in sections:
-            signature = self._create_signature(section)
-            doc_signatures.append(signature)
+        # Divide the document terms into sections of 5 terms each (by default)
+        step = self._section_step(terms)
+        sections = [terms[i:i+step] for i in range(0, len(terms), step)]
+        doc_signatures = self._stack([self._create_signature(section) for section in sections])
 
         # Store the document and its corresponding signatures
         self.documents.append(document)
         self.signatures.append(doc_signatures)
+        self._signature_matrix = None  # Needs to be packed again
 
-        return doc_signatures  # Return the list of signatures for the document
+        return doc_signatures  # Return the signatures of the document, one row per section
 
     def query_to_representation(self, query: str):
-        query_terms = query.lower().split()  # Convert query terms to lower case
-        # Divide the query terms into sections of 5 terms (or fewer)
-        sections = [query_terms[i:i+5] for i in range(0, len(query_terms), 5)]
-        query_signatures = [self._create_signature(section) for section in sections]
-        return query_signatures  # Return a list of signatures for each section of the query
+        query_signatures = self._query_signatures.get(query)
+        if query_signatures is not None:
+            self._query_signatures.move_to_end(query)
+        else:
+            query_terms = query.lower().split()  # Convert query terms to lower case
+            # Divide the query terms into sections of 5 terms (or fewer, by default)
+            step = self._section_step(query_terms)
+            sections = [query_terms[i:i+step] for i in range(0, len(query_terms), step)]
+            query_signatures = self._stack([self._create_signature(section) for section in sections])
+            self._query_signatures[query] = query_signatures
+            if len(self._query_signatures) > QUERY_SIGNATURE_CACHE_SIZE:
+                self._query_signatures.popitem(last=False)  # Evict the least recently used entry
+        return query_signatures  # Return the signatures of the query, one row per section
 
     def match(self, document_signatures, query_signatures) -> bool:
+        return bool(self._section_hits(document_signatures, query_signatures).any())
+
+    def _section_hits(self, section_signatures, query_signatures) -> np.ndarray:
+        """
+        Matches every section signature against every query signature in one vectorized step.
+        :return: Boolean array with one entry per section, True if the section matches any query signature
+        """
         # Stricter matching threshold to avoid too many false positives
-        for doc_sig in document_signatures:
-            for query_sig in query_signatures:
-                matching_bits = sum(1 for doc_bit, query_bit in zip(doc_sig, query_sig) if doc_bit & query_bit)
-                query_active_bits = sum(query_sig)  # Total number of '1's in the query signature
-                if query_active_bits > 0 and matching_bits / query_active_bits >= 0.75:  # Tighten match threshold
-                    return True
-        return False
+        query_active_bits = _popcount(query_signatures).sum(axis=1)  # Total number of '1's per query signature
+        # Matching bits of every (section, query signature) pair
+        matching_bits = _popcount(section_signatures[:, None, :] & query_signatures[None, :, :]).sum(axis=2)
+        # Tighten match threshold: matching_bits / query_active_bits >= 0.75
+        return ((query_active_bits > 0) & (4 * matching_bits >= 3 * query_active_bits)).any(axis=1)
+
+    def _stack(self, signatures) -> np.ndarray:
+        """
+        Stacks packed signatures into a matrix with one row of uint64 words per signature.
+        """
+        if not signatures:
+            return np.zeros((0, self._words), dtype=np.uint64)
+        return np.stack(signatures)
+
+    def _match_all(self, query_signatures) -> np.ndarray:
+        """
+        Vectorized version of match() against all stored documents at once.
+        :return: Boolean array with one entry per document
+        """
+        if self._signature_matrix is None:
+            self._signature_matrix = np.concatenate([self._stack([])] + self.signatures)
+            self._section_documents = np.repeat(np.arange(len(self.signatures)),
+                                                [len(doc_signatures) for doc_signatures in self.signatures])
+
+        matches = np.zeros(len(self.signatures), dtype=bool)
+        matches[self._section_documents[self._section_hits(self._signature_matrix, query_signatures)]] = True
+        return matches
 
     def search(self, query: str):
         """
         Searches for documents that match the given query, handling logical operators.
         """
         # Tokenize the query by splitting on AND (&), OR (|), parentheses, and stripping tokens
-        tokens = re.split(r'(\(|\)|\&|\|)', query.lower())
-        tokens = [token.strip() for token in tokens if token.strip()]  # Remove empty spaces
-
-        result_stack = []
-        operator_stack = []  # Stack for operators (&, |, -)
-
-        def apply_operator():
-            """ Helper function to apply the operator on top of the operator stack to the result stack. """
-            if len(result_stack) < 2 and operator_stack[-1] != '-':
-                return []  # Not enough operands for binary operators
-            right = result_stack.pop() if operator_stack[-1] != '-' else None
-            left = result_stack.pop() if right else result_stack.pop()
-
-            operator = operator_stack.pop()
-
-            if operator == '&':
-                result_stack.append([l & r for l, r in zip(left, right)])  # Bitwise AND operation
-            elif operator == '|':
-                result_stack.append([l | r for l, r in zip(left, right)])  # Bitwise OR operation
-            elif operator == '-':
-                result_stack.append([not l for l in left])  # Logical NOT
-
-        for token in tokens:
-            if token in ('&', '|'):
-                # Apply the last operator if it's already present
-                while operator_stack and operator_stack[-1] in ('&', '|'):
-                    apply_operator()
-                operator_stack.append(token)
-            elif token == '-':
-                # Negation (NOT) operator; no need to check stack size before
-                operator_stack.append(token)
-            else:
-                # It's a term, get the document signatures and perform matching
-                query_signatures = self.query_to_representation(token)
-                matches = [self.match(doc_signatures, query_signatures) for doc_signatures in self.signatures]
-                result_stack.append(matches)
-
-        # After all tokens, apply any remaining operators
-        while operator_stack:
-            apply_operator()
-
-        # Final check after processing all tokens
-        if not result_stack:
+        tokens = _SIGNATURE_QUERY_TOKEN.findall(query.lower())
+        # Terms match their signatures against all documents at once; the operators work element-wise on the results
+        operations = (lambda term: self._match_all(self.query_to_representation(term)),
+                      np.logical_and, np.logical_or, np.logical_not)
+        final_matches = _evaluate_query(_compile_query(tuple(tokens)), operations)
+        if final_matches is None:
             return []  # If nothing is on the stack, return no matches
 
-        final_matches = result_stack.pop()
-
         # Get all documents that matched
-        results = [self.documents[i] for i, match in enumerate(final_matches) if match]
-
-        return results
+        return [self.documents[i] for i in np.flatnonzero(final_matches)]
 
     def __str__(self):
         return 'Boolean Model (Signatures)'
@@ -371,57 +508,87 @@ class VectorSpaceModel(RetrievalModel):
     def __init__(self):
         self.inverted_index = defaultdict(list)
         self.document_vectors = {}
-        self.doc_lengths = {}
         self.num_documents = 0
+        # L2-normalized TF-IDF weights of all documents, one row per document and one column per term
+        self.document_matrix = None
+        self.vocabulary = {}  # Maps each term to its column in the document matrix
+        self.idf = None  # Inverse document frequency of every term, indexed like the vocabulary
 
     def build_inverted_index(self, documents):
         self.num_documents = len(documents)
+        self.inverted_index = defaultdict(list)
+        self.vocabulary = {}
+
+        # Collect the (document, term, tf) triplets in the same pass that fills the postings; terms get their column
+        # in order of first occurrence
+        rows, columns, term_frequencies = [], [], []
         for doc_id, document in enumerate(documents):
-            term_freq = Counter(term.lower() for term in document.terms)  # Convert terms to lower case
+            # Lower case, interned terms, so that the postings and vocabulary keys are shared strings
+            term_freq = _term_counts(document.terms)
             for term, freq in term_freq.items():
                 self.inverted_index[term].append((doc_id, freq))
-        
-        for doc_id, document in enumerate(documents):
-            self.document_vectors[doc_id] = self._create_document_vector(doc_id, document.terms)
-        
-        self.doc_lengths = {doc_id: np.linalg.norm(vec) for doc_id, vec in self.document_vectors.items()}
+                rows.append(doc_id)
+                columns.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                term_frequencies.append(freq)
+
+        # The document frequency of a term is the number of triplets in its column
+        document_frequencies = np.bincount(columns, minlength=len(self.vocabulary))
+        # Single precision halves the memory traffic of scoring; it is plenty for ranking by cosine similarity
+        self.idf = np.log(self.num_documents / document_frequencies, dtype=np.float32)
+
+        # Fill the whole matrix in one step
+        self.document_matrix = np.zeros((self.num_documents, len(self.vocabulary)), dtype=np.float32)
+        self.document_matrix[rows, columns] = term_frequencies
+        self.document_matrix *= self.idf
+        self.document_matrix /= _norms(self.document_matrix)
+
+        self.document_vectors = dict(enumerate(self.document_matrix))
+
+    def match_all(self, query_representation) -> np.ndarray:
+        """
+        Vectorized version of match() against all indexed documents at once.
+        :param query_representation: Sparse query vector, as returned by query_to_representation()
+        :return: Array with the cosine similarity of every document, in document order
+        """
+        indices, weights = query_representation
+        return self.document_matrix[:, indices] @ weights
 
     def _create_document_vector(self, doc_id, terms):
-        term_freq = Counter(term.lower() for term in terms)  # Convert terms to lower case
-        vec = np.zeros(len(self.inverted_index))
-        for term, idx in zip(self.inverted_index.keys(), range(len(self.inverted_index))):
-            if term in term_freq:
-                tf = term_freq[term]
-                idf = math.log(self.num_documents / len(self.inverted_index[term]))
-                vec[idx] = tf * idf
+        term_freq = _term_counts(terms)  # Convert terms to lower case
+        indices, weights = self._tf_idf_weights(term_freq)
+        vec = np.zeros(len(self.vocabulary), dtype=np.float32)
+        vec[indices] = weights
         return vec
 
-    def document_to_representation(self, document: Document, stopword_filtering=False, stemming=False):
-        if stopword_filtering:
-            terms = document.filtered_terms
-        else:
-            terms = document.terms
-
-        if stemming:
-            terms = document.stemmed_terms
+    def _tf_idf_weights(self, term_freq: Counter) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Creates the sparse, L2-normalized TF-IDF vector of the given term frequencies. Only the terms that actually
+        occur are visited, terms that are not in the vocabulary are ignored.
+        :return: Tuple of the vocabulary indices of the non-zero entries and their weights
+        """
+        indices = []
+        weights = []
+        for term, tf in term_freq.items():
+            idx = self.vocabulary.get(term)
+            if idx is not None:
+                indices.append(idx)
+                weights.append(tf * self.idf[idx])
+        weights = np.array(weights, dtype=np.float32)
+        return np.array(indices, dtype=np.intp), weights / _norms(weights)
 
+    def document_to_representation(self, document: Document, stopword_filtering=False, stemming=False):
+        terms = _document_terms(document, stopword_filtering, stemming)
         return self._create_document_vector(document.document_id, terms)
 
     def query_to_representation(self, query: str):
-        query_terms = query.lower().split()  # Convert query terms to lower case
-        term_freq = Counter(query_terms)
-        vec = np.zeros(len(self.inverted_index))
-        for term, idx in zip(self.inverted_index.keys(), range(len(self.inverted_index))):
-            if term in term_freq:
-                tf = term_freq[term]
-                idf = math.log(self.num_documents / len(self.inverted_index[term]))
-                vec[idx] = tf * idf
-        return vec
+        query_terms = map(sys.intern, query.lower().split())  # Convert query terms to lower case
+        return self._tf_idf_weights(Counter(query_terms))  # Sparse: only the few non-zero entries are kept
 
     def match(self, document_representation, query_representation) -> float:
-        if np.linalg.norm(document_representation) == 0 or np.linalg.norm(query_representation) == 0:
-            return 0.0
-        return np.dot(document_representation, query_representation) / (np.linalg.norm(document_representation) * np.linalg.norm(query_representation))
+        # Both vectors are L2-normalized (or zero) by construction, so their dot product is the cosine similarity; only
+        # the non-zero entries of the sparse query vector contribute to it
+        indices, weights = query_representation
+        return float(document_representation[indices] @ weights)
 
     def __str__(self):
         return 'Vector Space Model'
@@ -1,6 +1,65 @@
 import re
+import sys
+from functools import lru_cache
+from itertools import chain
+
 from document import Document
 
+# Patterns of the stem conditions, compiled once at import instead of on every call
+_MEASURE_PATTERN = re.compile("^[^aeiou]*([aeiouy][^aeiou])")
+_VOWEL_PATTERN = re.compile(r"[aeiouy]")
+_DOUBLE_CONSONANT_PATTERN = re.compile(r"(.)\1$")
+_CVC_PATTERN = re.compile(r"[^aeiou][aeiouy][^aeiou][^wxy]$")
+
+# Suffix rules of steps 2 to 4 as (suffix, replacement) pairs, in the order in which they are tried
+_STEP_2_SUFFIXES = (
+    ('ational', 'ate'), ('tional', 'tion'), ('enci', 'ence'), ('anci', 'ance'),
+    ('izer', 'ize'), ('abli', 'able'), ('alli', 'al'), ('entli', 'ent'),
+    ('eli', 'e'), ('ousli', 'ous'), ('ization', 'ize'), ('ation', 'ate'),
+    ('ator', 'ate'), ('alism', 'al'), ('iveness', 'ive'), ('fulness', 'ful'),
+    ('ousness', 'ous'), ('aliti', 'al'), ('iviti', 'ive'), ('biliti', 'ble')
+)
+_STEP_3_SUFFIXES = (
+    ('icate', 'ic'), ('ative', ''), ('alize', 'al'), ('iciti', 'ic'),
+    ('ical', 'ic'), ('ful', ''), ('ness', '')
+)
+_STEP_4_SUFFIXES = tuple((suffix, '') for suffix in (
+    'al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment', 'ent',
+    'sion', 'tion', 'ou', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize'
+))
+
+
+def _suffix_pattern(rules: tuple) -> re.Pattern:
+    """
+    Compiles a pattern that matches a term ending with any suffix of the given rules.
+    :param rules: Tuple of (suffix, replacement) pairs
+    :return: Compiled pattern anchored at the end of the term
+    """
+    return re.compile(f"(?:{'|'.join(suffix for suffix, _ in rules)})$")
+
+
+_STEP_2_PATTERN = _suffix_pattern(_STEP_2_SUFFIXES)
+_STEP_3_PATTERN = _suffix_pattern(_STEP_3_SUFFIXES)
+_STEP_4_PATTERN = _suffix_pattern(_STEP_4_SUFFIXES)
+
+
+def _replace_suffix(term: str, pattern: re.Pattern, rules: tuple, min_measure: int) -> str:
+    """
+    Applies the first rule whose suffix ends the term and whose remaining stem has a measure greater than min_measure.
+    Most terms end with none of the suffixes, which the pattern rules out in a single scan.
+    :param term: Term to process
+    :param pattern: Pattern of all suffixes of the rules, see _suffix_pattern()
+    :param rules: Tuple of (suffix, replacement) pairs, tried in order
+    :param min_measure: The measure of the stem has to exceed this value
+    :return: Term with the suffix replaced, or the unchanged term if no rule applies
+    """
+    if pattern.search(term):
+        for suffix, replacement in rules:
+            if term.endswith(suffix) and get_measure(term[:-len(suffix)]) > min_measure:
+                return term[:-len(suffix)] + replacement
+    return term
+
+
 # Helper functions to identify certain conditions in stems
 def get_measure(term: str) -> int:
     """
@@ -8,11 +67,7 @@ def get_measure(term: str) -> int:
     :param term: Given term/word
     :return: Measure value m
     """
-    constants = "[^aeiou]"  
-    vowels = "[aeiouy]"  
-    form = f"^{constants}*({vowels}{constants})"
-    m = len(re.findall(form, term))
-    return m
+    return len(_MEASURE_PATTERN.findall(term))
 
 def condition_v(stem: str) -> bool:
     """
@@ -20,7 +75,7 @@ def condition_v(stem: str) -> bool:
     :param stem: Word stem to check
     :return: True if the condition *v* holds
     """
-    return bool(re.search(r"[aeiouy]", stem))
+    return bool(_VOWEL_PATTERN.search(stem))
 
 def condition_d(stem: str) -> bool:
     """
@@ -28,7 +83,7 @@ def condition_d(stem: str) -> bool:
     :param stem: Word stem to check
     :return: True if the condition *d holds
     """
-    return bool(re.search(r"(.)\1$", stem))
+    return bool(_DOUBLE_CONSONANT_PATTERN.search(stem))
 
 def cond_o(stem: str) -> bool:
     """
@@ -37,19 +92,19 @@ def cond_o(stem: str) -> bool:
     :param stem: Word stem to check
     :return: True if the condition *o holds
     """
-    return bool(re.search(r"[^aeiou][aeiouy][^aeiou][^wxy]$", stem))
+    return bool(_CVC_PATTERN.search(stem))
 
+@lru_cache(maxsize=200_000)
 def stem_term(term: str) -> str:
     """
-    Stems a given term of the English language using the Porter stemming algorithm.
+    Stems a given term of the English language using the Porter stemming algorithm. The function is pure, so results
+    are cached and every distinct term is stemmed only once per session (e.g. across rebuilds and queries).
     :param term:
     :return:
     """
     original_term = term
     # Step 1a
-    if term.endswith('sses'):
-        term = term[:-2]
-    elif term.endswith('ies'):
+    if term.endswith(('sses', 'ies')):
         term = term[:-2]
     elif term.endswith('ss'):
         pass
@@ -60,18 +115,10 @@ def stem_term(term: str) -> str:
     if term.endswith('eed'):
         if get_measure(term[:-3]) > 0:
             term = term[:-1]
-    elif term.endswith('ed'):
-        if condition_v(term[:-2]):
-            term = term[:-2]
-            if term.endswith(('at', 'bl', 'iz')):
-                term += 'e'
-            elif condition_d(term) and not term[-1] in "lsz":
-                term = term[:-1]
-            elif cond_o(term):
-                term += 'e'
-    elif term.endswith('ing'):
-        if condition_v(term[:-3]):
-            term = term[:-3]
+    elif term.endswith(('ed', 'ing')):
+        stem = term[:-2] if term[-1] == 'd' else term[:-3]
+        if condition_v(stem):
+            term = stem
             if term.endswith(('at', 'bl', 'iz')):
                 term += 'e'
             elif condition_d(term) and not term[-1] in "lsz":
@@ -84,37 +131,13 @@ def stem_term(term: str) -> str:
         term = term[:-1] + 'i'
 
     # Step 2
-    step_2_suffixes = [
-        ('ational', 'ate'), ('tional', 'tion'), ('enci', 'ence'), ('anci', 'ance'),
-        ('izer', 'ize'), ('abli', 'able'), ('alli', 'al'), ('entli', 'ent'),
-        ('eli', 'e'), ('ousli', 'ous'), ('ization', 'ize'), ('ation', 'ate'),
-        ('ator', 'ate'), ('alism', 'al'), ('iveness', 'ive'), ('fulness', 'ful'),
-        ('ousness', 'ous'), ('aliti', 'al'), ('iviti', 'ive'), ('biliti', 'ble')
-    ]
-    for suffix, replacement in step_2_suffixes:
-        if term.endswith(suffix) and get_measure(term[:-len(suffix)]) > 0:
-            term = term[:-len(suffix)] + replacement
-            break
+    term = _replace_suffix(term, _STEP_2_PATTERN, _STEP_2_SUFFIXES, 0)
 
     # Step 3
-    step_3_suffixes = [
-        ('icate', 'ic'), ('ative', ''), ('alize', 'al'), ('iciti', 'ic'),
-        ('ical', 'ic'), ('ful', ''), ('ness', '')
-    ]
-    for suffix, replacement in step_3_suffixes:
-        if term.endswith(suffix) and get_measure(term[:-len(suffix)]) > 0:
-            term = term[:-len(suffix)] + replacement
-            break
+    term = _replace_suffix(term, _STEP_3_PATTERN, _STEP_3_SUFFIXES, 0)
 
     # Step 4
-    step_4_suffixes = [
-        'al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment', 'ent',
-        'sion', 'tion', 'ou', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize'
-    ]
-    for suffix in step_4_suffixes:
-        if term.endswith(suffix) and get_measure(term[:-len(suffix)]) > 1:
-            term = term[:-len(suffix)]
-            break
+    term = _replace_suffix(term, _STEP_4_PATTERN, _STEP_4_SUFFIXES, 1)
 
     # Step 5a
     if term.endswith('e'):
@@ -135,8 +158,12 @@ def stem_all_docs(doc_collection: list[Document]):
     Warning: The result is NOT saved in the document's term list, but in the extra field stemmed_terms!
     :param doc_collection: Document collection to process
     """
+    # Every distinct term is stemmed only once; the documents then look their stems up in the table. Stems are interned,
+    # so that terms with the same stem (e.g. "fox" and "foxes") share one string object.
+    distinct_terms = set(chain.from_iterable(doc.terms for doc in doc_collection))
+    stems = dict(zip(distinct_terms, map(sys.intern, map(stem_term, distinct_terms))))
     for doc in doc_collection:
-        doc.stemmed_terms = [stem_term(term) for term in doc.terms]
+        doc.stemmed_terms = [stems[term] for term in doc.terms]
 
 def stem_query_terms(query: str) -> str:
     """
@@ -144,6 +171,4 @@ def stem_query_terms(query: str) -> str:
     :param query: User query, may contain Boolean operators and spaces.
     :return: Query with stemmed terms
     """
-    terms = query.split()
-    stemmed_terms = [stem_term(term) for term in terms]
-    return ' '.join(stemmed_terms)
+    return ' '.join(map(stem_term, query.split()))
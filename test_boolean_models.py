@@ -0,0 +1,168 @@
+import random
+import unittest
+
+import models
+from document import Document
+
+# Small hand-built collection; mixed case terms check that the models lowercase them.
+COLLECTION_TERMS = [
+    ['The', 'fox', 'and', 'the', 'grapes'],
+    ['The', 'wolf', 'and', 'the', 'lamb'],
+    ['The', 'fox', 'and', 'the', 'wolf'],
+    ['The', 'lion', 'and', 'the', 'mouse'],
+    ['The', 'lion', 'the', 'fox', 'and', 'the', 'wolf'],
+    ['A', 'man', 'and', 'his', 'dog'],
+]
+VOCABULARY = ['fox', 'wolf', 'lion', 'man', 'the', 'grapes', 'unicorn']
+
+
+def build_collection() -> list[Document]:
+    collection = []
+    for doc_id, terms in enumerate(COLLECTION_TERMS):
+        document = Document()
+        document.document_id = doc_id
+        document.title = f'Fable {doc_id}'
+        document.raw_text = ' '.join(terms)
+        document.terms = list(terms)
+        collection.append(document)
+    return collection
+
+
+def brute_force(node, collection: list[Document]) -> set:
+    """
+    Evaluates a query tree by checking every document, independently of the models.
+    :param node: A term, ('-', operand), or ('&' | '|', left, right)
+    :return: Set of IDs of the matching documents
+    """
+    if isinstance(node, str):
+        return {d.document_id for d in collection if node in map(str.lower, d.terms)}
+    if node[0] == '-':
+        return {d.document_id for d in collection} - brute_force(node[1], collection)
+    left, right = brute_force(node[1], collection), brute_force(node[2], collection)
+    return left & right if node[0] == '&' else left | right
+
+
+def random_tree(rng: random.Random, depth: int):
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(VOCABULARY)
+    if rng.random() < 0.25:
+        return '-', random_tree(rng, depth - 1)
+    return rng.choice('&|'), random_tree(rng, depth - 1), random_tree(rng, depth - 1)
+
+
+def render_parenthesized(node) -> str:
+    """
+    Renders a query tree with every compound operand in parentheses, so that the result does not depend on precedence.
+    """
+    if isinstance(node, str):
+        return node
+    if node[0] == '-':
+        operand = render_parenthesized(node[1])
+        return '-' + operand if isinstance(node[1], str) else f'-({operand})'
+    return f'({render_parenthesized(node[1])}) {node[0]} ({render_parenthesized(node[2])})'
+
+
+PRECEDENCE = {'|': 1, '&': 2, '-': 3}
+
+
+def render_minimal(node, rng: random.Random) -> str:
+    """
+    Renders a query tree with parentheses only where precedence requires them ('-' before '&' before '|', binary
+    operators left-associative), plus some redundant ones, and with a random number of spaces around operators.
+    """
+    if isinstance(node, str):
+        text = node
+    elif node[0] == '-':
+        operand = render_minimal(node[1], rng)
+        text = '-' + (operand if isinstance(node[1], str) or node[1][0] == '-' else f'({operand})')
+    else:
+        operator = node[0]
+        left, right = render_minimal(node[1], rng), render_minimal(node[2], rng)
+        if not isinstance(node[1], str) and PRECEDENCE[node[1][0]] < PRECEDENCE[operator]:
+            left = f'({left})'
+        if not isinstance(node[2], str) and PRECEDENCE[node[2][0]] <= PRECEDENCE[operator]:
+            right = f'({right})'
+        text = left + ' ' * rng.randint(0, 1) + operator + ' ' * rng.randint(0, 1) + right
+    return f'({text})' if rng.random() < 0.1 else text
+
+
+class BooleanModelsTest(unittest.TestCase):
+    def setUp(self):
+        self.collection = build_collection()
+        self.linear = models.LinearBooleanModel()
+        for document in self.collection:
+            self.linear.add_document(document)
+        self.inverted = models.InvertedListBooleanModel()
+        self.inverted.build_inverted_list(self.collection)
+
+    def search_both(self, query: str) -> tuple[set, set]:
+        # The linear model returns the stored representations; map them back to their position (= document ID)
+        positions = {id(representation): doc_id for doc_id, representation in enumerate(self.linear.documents)}
+        linear = {positions[id(representation)] for representation in self.linear.search(query)}
+        inverted = {int(doc_id) for doc_id in self.inverted.search(query)}
+        return linear, inverted
+
+    def assert_query(self, query: str, expected: set):
+        linear, inverted = self.search_both(query)
+        self.assertEqual(expected, linear, f'linear model, query {query!r}')
+        self.assertEqual(expected, inverted, f'inverted list model, query {query!r}')
+
+    def test_random_parenthesized_queries(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            tree = random_tree(rng, 4)
+            self.assert_query(render_parenthesized(tree), brute_force(tree, self.collection))
+
+    def test_random_queries_relying_on_precedence(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            tree = random_tree(rng, 4)
+            self.assert_query(render_minimal(tree, rng), brute_force(tree, self.collection))
+
+    def test_precedence(self):
+        # '&' binds tighter than '|', '-' binds tighter than both
+        self.assert_query('man | fox & wolf', {2, 4, 5})
+        self.assert_query('fox & wolf | man', {2, 4, 5})
+        self.assert_query('(man | fox) & wolf', {2, 4})
+        self.assert_query('-fox & wolf', {1})
+        self.assert_query('-(fox & wolf)', {0, 1, 3, 5})
+        self.assert_query('lion | -fox & wolf', {1, 3, 4})
+
+    def test_double_negation(self):
+        self.assert_query('--fox', {0, 2, 4})
+        self.assert_query('- - fox', {0, 2, 4})
+        self.assert_query('---fox', {1, 3, 5})
+        self.assert_query('wolf & --fox', {2, 4})
+        self.assert_query('-(-fox)', {0, 2, 4})
+
+    def test_only_negations(self):
+        self.assert_query('-', set())
+        self.assert_query('- -', set())
+        self.assert_query('- & -', set())
+
+    def test_simple_operators(self):
+        self.assert_query('fox', {0, 2, 4})
+        self.assert_query('FOX', {0, 2, 4})
+        self.assert_query('fox & wolf', {2, 4})
+        self.assert_query('fox | lion', {0, 2, 3, 4})
+        self.assert_query('fox & -wolf', {0})
+        self.assert_query('-fox', {1, 3, 5})
+
+    def test_missing_term(self):
+        self.assert_query('unicorn', set())
+        self.assert_query('fox & unicorn', set())
+        self.assert_query('fox | unicorn', {0, 2, 4})
+        self.assert_query('-unicorn', {0, 1, 2, 3, 4, 5})
+
+    def test_dangling_operators_are_skipped(self):
+        self.assert_query('fox &', {0, 2, 4})
+        self.assert_query('& fox', {0, 2, 4})
+        self.assert_query('fox |', {0, 2, 4})
+        self.assert_query('& |', set())
+        self.assert_query('', set())
+        self.assert_query('(fox', {0, 2, 4})
+        self.assert_query('fox)', {0, 2, 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import cleanup
+from document import Document
+
+STOP_WORDS = frozenset(['a', 'the', 'and'])
+
+
+class StopWordFilterTest(unittest.TestCase):
+    def test_raw_terms_are_cleaned_and_compared_case_insensitively(self):
+        terms = ['The', 'fox,', '"Ho!', 'straw.', 'A', 'the', 'Fox', "lion's"]
+        self.assertEqual(['fox', 'Ho', 'straw', 'Fox', 'lion'],
+                         cleanup.remove_stop_words_from_term_list(terms, STOP_WORDS))
+
+    def test_clean_terms(self):
+        self.assertEqual(['fox', 'wolf'],
+                         cleanup.remove_stop_words_from_term_list(['the', 'fox', 'and', 'the', 'wolf'], STOP_WORDS))
+
+    def test_filter_collection_matches_term_list_filter(self):
+        collection = []
+        for terms in (['The', 'fox,', 'and', 'the', 'wolf.'], ['A', 'Lion', 'and', 'a', 'mouse'], []):
+            document = Document()
+            document.terms = terms
+            collection.append(document)
+        cleanup.filter_collection(collection, STOP_WORDS)
+        for document in collection:
+            self.assertEqual(cleanup.remove_stop_words_from_term_list(document.terms, STOP_WORDS),
+                             document.filtered_terms)
+        self.assertEqual(['fox', 'wolf'], collection[0].filtered_terms)
+
+    def test_is_stop_word(self):
+        self.assertTrue(cleanup.is_stop_word('The', STOP_WORDS))
+        self.assertFalse(cleanup.is_stop_word('fox', STOP_WORDS))
+
+
+class CrouchStopWordListTest(unittest.TestCase):
+    def test_low_frequency_terms_are_stop_words(self):
+        document = Document()
+        document.terms = ['the'] * 4 + ['fox'] * 3 + ['wolf'] * 2 + ['lion']
+        stop_words = cleanup.create_stop_word_list_by_frequency([document], high_frequency_threshold=4,
+                                                                 low_frequency_threshold=2)
+        self.assertEqual(frozenset(['wolf', 'lion']), stop_words)
+
+    def test_terms_are_counted_across_the_collection(self):
+        documents = []
+        for terms in (['fox', 'wolf'], ['fox', 'lion'], ['fox']):
+            document = Document()
+            document.terms = terms
+            documents.append(document)
+        stop_words = cleanup.create_stop_word_list_by_frequency(documents, low_frequency_threshold=1)
+        self.assertEqual(frozenset(['wolf', 'lion']), stop_words)
+
+if __name__ == '__main__':
+    unittest.main()